@@ -0,0 +1,56 @@
+import unittest
+import sys
+import os
+import asyncio
+import httpx
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.clients.blue_onyx import BlueOnyxClient
+
+try:
+    from python_multipart.multipart import parse_options_header
+except ModuleNotFoundError:  # Older python-multipart releases
+    from multipart.multipart import parse_options_header
+
+class TestBlueOnyxClient(unittest.TestCase):
+    def setUp(self):
+        self.image_data = os.urandom(200_000)
+        self.received = {}
+
+        async def handler(request: httpx.Request) -> httpx.Response:
+            self.received["headers"] = request.headers
+            self.received["body"] = await request.aread()
+            return httpx.Response(200, json={"success": True, "predictions": []})
+
+        self.client = BlueOnyxClient("http://blue-onyx", transport=httpx.MockTransport(handler))
+
+    def test_streams_memoryview_as_multipart(self):
+        buffer = bytearray(b"junk" + self.image_data + b"junk")
+        view = memoryview(buffer)[4:4 + len(self.image_data)]
+
+        result = asyncio.run(self.client.detect(view))
+
+        self.assertTrue(result["success"])
+        headers, body = self.received["headers"], self.received["body"]
+        self.assertEqual(int(headers["content-length"]), len(body))
+        self.assertNotIn("transfer-encoding", headers)
+
+        media_type, params = parse_options_header(headers["content-type"])
+        self.assertEqual(media_type, b"multipart/form-data")
+        boundary = params[b"boundary"]
+        self.assertTrue(body.startswith(b"--" + boundary + b"\r\n"))
+        self.assertTrue(body.endswith(b"\r\n--" + boundary + b"--\r\n"))
+
+        part_headers, _, rest = body.partition(b"\r\n\r\n")
+        self.assertIn(b'name="image"', part_headers)
+        self.assertIn(b"Content-Type: image/jpeg", part_headers)
+        self.assertEqual(rest[:-len(b"\r\n--" + boundary + b"--\r\n")], self.image_data)
+
+    def test_accepts_bytes(self):
+        asyncio.run(self.client.detect(self.image_data))
+        self.assertIn(self.image_data, self.received["body"])
+
+if __name__ == "__main__":
+    unittest.main()
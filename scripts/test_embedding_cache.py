@@ -0,0 +1,95 @@
+import unittest
+import sys
+import os
+import tempfile
+import numpy as np
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.inference.embedding_cache import EmbeddingCache
+
+FINGERPRINT = {"model_version": "test", "region": "AUS"}
+
+class TestEmbeddingCache(unittest.TestCase):
+    def setUp(self):
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.cache_dir = temp_dir.name
+        rng = np.random.default_rng(0)
+        self.vectors = [EmbeddingCache.normalize(rng.normal(size=16)) for _ in range(4)]
+
+    def make_cache(self, capacity=3, fingerprint=FINGERPRINT):
+        return EmbeddingCache(self.cache_dir, dim=16, capacity=capacity, threshold=0.95, fingerprint=fingerprint)
+
+    def test_hit_within_threshold(self):
+        cache = self.make_cache()
+        self.assertIsNone(cache.lookup(self.vectors[0]))
+        cache.add(self.vectors[0], 7, 0.9)
+
+        # Slightly perturbed embedding of the same subject -> hit
+        class_index, score = cache.lookup(EmbeddingCache.normalize(self.vectors[0] + 0.01))
+        self.assertEqual(class_index, 7)
+        self.assertAlmostEqual(score, 0.9, places=5)
+        # Unrelated embedding -> miss
+        self.assertIsNone(cache.lookup(self.vectors[1]))
+
+        stats = cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"]), (1, 2))
+        self.assertAlmostEqual(stats["hit_rate"], 1 / 3, places=3)
+
+    def test_evicts_least_recently_used(self):
+        cache = self.make_cache(capacity=3)
+        for i in range(3):
+            cache.add(self.vectors[i], i, 0.9)
+        cache.lookup(self.vectors[0])
+        cache.lookup(self.vectors[1])
+
+        # Full: vectors[2] was used least recently and gets replaced
+        cache.add(self.vectors[3], 3, 0.8)
+        self.assertIsNone(cache.lookup(self.vectors[2]))
+        self.assertEqual(cache.lookup(self.vectors[3])[0], 3)
+        self.assertEqual(cache.stats()["evictions"], 1)
+        self.assertEqual(cache.stats()["entries"], 3)
+
+    def test_rejects_zero_capacity(self):
+        with self.assertRaisesRegex(ValueError, "capacity"):
+            self.make_cache(capacity=0)
+
+    def test_persists_across_restarts(self):
+        cache = self.make_cache()
+        cache.add(self.vectors[0], 5, 0.9)
+        cache.flush()
+        del cache
+
+        reopened = self.make_cache()
+        self.assertEqual(reopened.count, 1)
+        self.assertEqual(reopened.lookup(self.vectors[0])[0], 5)
+
+    def test_resets_when_model_changes(self):
+        cache = self.make_cache()
+        cache.add(self.vectors[0], 5, 0.9)
+        cache.flush()
+        del cache
+
+        reopened = self.make_cache(fingerprint={"model_version": "other", "region": "AUS"})
+        self.assertEqual(reopened.count, 0)
+        self.assertIsNone(reopened.lookup(self.vectors[0]))
+
+    def test_rebuilds_truncated_files(self):
+        cache = self.make_cache()
+        cache.add(self.vectors[0], 5, 0.9)
+        cache.flush()
+        del cache
+
+        # Simulate a crash mid-create: index.json matches but the vectors file is short
+        with open(os.path.join(self.cache_dir, EmbeddingCache.VECTORS_FILE), "r+b") as fp:
+            fp.truncate(10)
+
+        reopened = self.make_cache()
+        self.assertEqual(reopened.count, 0)
+        reopened.add(self.vectors[1], 2, 0.9)
+        self.assertEqual(reopened.lookup(self.vectors[1])[0], 2)
+
+if __name__ == "__main__":
+    unittest.main()
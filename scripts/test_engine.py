@@ -9,6 +9,7 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
 from src.clients.blue_onyx import BlueOnyxClient
 from src.inference.speciesnet_wrapper import SpeciesNetWrapper
+from src.inference.taxonomy import TaxonomyIndex
 from src.engine import DetectionEngine
 from src.config import settings
 
@@ -16,6 +17,13 @@ class TestDetectionEngine(unittest.TestCase):
     def setUp(self):
         self.blue_onyx = MagicMock(spec=BlueOnyxClient)
         self.speciesnet = MagicMock(spec=SpeciesNetWrapper)
+        self.speciesnet.taxonomy = TaxonomyIndex([
+            settings.SPECIESNET_BLANK_LABEL,                                      # 0
+            "some-uuid;;;;;;blank",                                               # 1
+            "uuid-cat;mammalia;carnivora;felidae;felis;catus;Felis catus",        # 2
+            "uuid-possum;mammalia;diprotodontia;phalangeridae;;;Possum",          # 3
+            "uuid-real;mammalia;;;;;Real Animal",                                 # 4
+        ], blank_label=settings.SPECIESNET_BLANK_LABEL)
         # Mock settings for the engine
         settings.TRIGGER_LABELS = ["cat", "empty"]
         self.engine = DetectionEngine(self.blue_onyx, self.speciesnet)
@@ -43,7 +51,7 @@ class TestDetectionEngine(unittest.TestCase):
             "predictions": [{"label": "cat", "confidence": 0.8}]
         })
         self.speciesnet.predict.return_value = [
-            {"label": "Felis catus", "confidence": 0.95}
+            {"class_index": 2, "label": "Felis catus", "confidence": 0.95}
         ]
         
         # Action
@@ -60,7 +68,7 @@ class TestDetectionEngine(unittest.TestCase):
             "predictions": []
         })
         self.speciesnet.predict.return_value = [
-            {"label": "Possum", "confidence": 0.9}
+            {"class_index": 3, "label": "Possum", "confidence": 0.9}
         ]
         
         # Action
@@ -75,31 +83,11 @@ class TestDetectionEngine(unittest.TestCase):
         # Setup: Blue Onyx finds nothing -> Trigger SpeciesNet
         self.blue_onyx.detect = AsyncMock(return_value={"success": True, "predictions": []})
         
-        # SpeciesNet returns a blank prediction with high confidence
+        # Blank flags come from the taxonomy index, keyed by class index
         self.speciesnet.predict.return_value = [
-            {"label": settings.SPECIESNET_BLANK_LABEL, "confidence": 0.99}, # The raw label string from settings
-            {"label": "Just Blank", "confidence": 0.95} # Should also check cleaned logic if we want, but let's test the raw match first
-        ]
-        # Wait, my logic in engine.py checks:
-        # if raw_label == settings.SPECIESNET_BLANK_LABEL or clean_label.lower() == "blank":
-        
-        # Let's test BOTH cases in one go or separate. 
-        # Case 1: Exact Match of Config String
-        
-        # Action
-        result = asyncio.run(self.engine.process_image(self.image_data))
-        
-        # Assert: Should be empty because "Just Blank" cleans to "blank" (if format is "uuid;...;blank") OR if it's just "Just Blank" -> "Just Blank" != "blank".
-        # Wait, split(";")[-1]. 
-        # "Just Blank".split(";")[-1] is "Just Blank". lower() is "just blank". != "blank".
-        # So "Just Blank" should be KEPT.
-        # But the first one should be FILTERED.
-        
-        # Let's adjust the test data to be precise.
-        self.speciesnet.predict.return_value = [
-            {"label": settings.SPECIESNET_BLANK_LABEL, "confidence": 0.99}, # Should be filtered (Exact Match)
-            {"label": "some-uuid;;;;;;blank", "confidence": 0.98}, # Should be filtered (Cleaned Match)
-            {"label": "Real Animal", "confidence": 0.95} # Should be Kept
+            {"class_index": 0, "label": "blank", "confidence": 0.99}, # Should be filtered (Exact Match of config label)
+            {"class_index": 1, "label": "blank", "confidence": 0.98}, # Should be filtered (Display name "blank")
+            {"class_index": 4, "label": "Real Animal", "confidence": 0.95} # Should be Kept
         ]
         
         result = asyncio.run(self.engine.process_image(self.image_data))
@@ -107,6 +95,34 @@ class TestDetectionEngine(unittest.TestCase):
         self.assertEqual(len(result["predictions"]), 2) # Real Animal + generic animal
         # The first two should be ignored.
         self.assertEqual(result["predictions"][0]["label"], "Real Animal")
+        # Internal class index must not leak into the Blue Iris response
+        self.assertNotIn("class_index", result["predictions"][0])
+
+class TestTaxonomyIndex(unittest.TestCase):
+    def test_flags_and_region_mask(self):
+        turkey = "uuid-turkey;aves;galliformes;phasianidae;meleagris;gallopavo;wild turkey"
+        wombat = "uuid-wombat;mammalia;diprotodontia;vombatidae;vombatus;ursinus;common wombat"
+        labels = [
+            "f1856211-cfb7-4a5b-9158-c0f72fd09ee6;;;;;;blank",
+            "990ae9dd-7a59-4344-afcb-1b7b21368000;mammalia;primates;hominidae;homo;sapiens;human",
+            "e2895ed5-780b-48f6-8a11-9e27cb594511;;;;;;vehicle",
+            turkey,
+            wombat,
+        ]
+        geofence_map = {
+            "aves;galliformes;phasianidae;meleagris;gallopavo": {"allow": {"USA": [], "CAN": []}},
+            "mammalia;diprotodontia;vombatidae;vombatus;ursinus": {"allow": {"AUS": []}},
+        }
+        index = TaxonomyIndex(labels, geofence_map=geofence_map, region="AUS")
+
+        self.assertEqual(index.display_names[4], "common wombat")
+        self.assertEqual(index.is_blank, [True, False, False, False, False])
+        self.assertEqual(index.is_human, [False, True, False, False, False])
+        self.assertEqual(index.is_vehicle, [False, False, True, False, False])
+        self.assertEqual(index.allowed, [True, True, True, False, True])
+        self.assertEqual(index.index_of[turkey], 3)
+        # No region configured -> nothing masked
+        self.assertEqual(TaxonomyIndex(labels, geofence_map=geofence_map).num_blocked, 0)
 
 if __name__ == "__main__":
     unittest.main()
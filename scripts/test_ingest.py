@@ -0,0 +1,101 @@
+import unittest
+import sys
+import os
+import asyncio
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from starlette.requests import Request
+from src.ingest import read_image_upload, UploadTooLargeError, InvalidUploadError
+
+BOUNDARY = "testboundary"
+
+def build_body(fields):
+    body = b""
+    for name, data in fields:
+        body += (
+            f"--{BOUNDARY}\r\n"
+            f'Content-Disposition: form-data; name="{name}"; filename="{name}.jpg"\r\n'
+            f"Content-Type: image/jpeg\r\n\r\n"
+        ).encode() + data + b"\r\n"
+    return body + f"--{BOUNDARY}--\r\n".encode()
+
+def make_request(body, chunk_size=1024, content_length=True, content_type=None):
+    headers = [(b"content-type", (content_type or f"multipart/form-data; boundary={BOUNDARY}").encode())]
+    if content_length:
+        headers.append((b"content-length", str(len(body)).encode()))
+    chunks = [body[i:i + chunk_size] for i in range(0, len(body), chunk_size)] or [b""]
+
+    async def receive():
+        chunk = chunks.pop(0)
+        return {"type": "http.request", "body": chunk, "more_body": bool(chunks)}
+
+    scope = {"type": "http", "method": "POST", "path": "/v1/vision/detection", "headers": headers}
+    return Request(scope, receive)
+
+class TestImageIngest(unittest.TestCase):
+    def setUp(self):
+        self.image_data = os.urandom(50_000)
+
+    def test_reads_image_field(self):
+        body = build_body([("other", b"ignored"), ("image", self.image_data)])
+        result = asyncio.run(read_image_upload(make_request(body), max_size=1_000_000))
+        self.assertIsInstance(result, memoryview)
+        self.assertEqual(bytes(result), self.image_data)
+
+    def test_reads_without_content_length(self):
+        body = build_body([("image", self.image_data)])
+        result = asyncio.run(read_image_upload(make_request(body, content_length=False), max_size=1_000_000))
+        self.assertEqual(bytes(result), self.image_data)
+
+    def test_rejects_oversized_content_length(self):
+        body = build_body([("image", self.image_data)])
+        with self.assertRaises(UploadTooLargeError):
+            asyncio.run(read_image_upload(make_request(body), max_size=10_000))
+
+    def test_rejects_oversized_stream(self):
+        # No Content-Length, so the limit must be enforced while streaming
+        body = build_body([("image", self.image_data)])
+        with self.assertRaises(UploadTooLargeError):
+            asyncio.run(read_image_upload(make_request(body, content_length=False), max_size=10_000))
+
+    def test_missing_image_field(self):
+        body = build_body([("other", self.image_data)])
+        with self.assertRaises(InvalidUploadError):
+            asyncio.run(read_image_upload(make_request(body), max_size=1_000_000))
+
+    def test_rejects_garbage_body(self):
+        with self.assertRaises(InvalidUploadError):
+            asyncio.run(read_image_upload(make_request(b"garbage"), max_size=1_000_000))
+
+    def test_rejects_bad_part_header(self):
+        body = (
+            f"--{BOUNDARY}\r\n"
+            "Content-Disposition form-data no colon here\r\n\r\n"
+            "data\r\n"
+            f"--{BOUNDARY}--\r\n"
+        ).encode()
+        with self.assertRaises(InvalidUploadError):
+            asyncio.run(read_image_upload(make_request(body), max_size=1_000_000))
+
+    def test_endpoint_returns_400_for_malformed_body(self):
+        from fastapi.testclient import TestClient
+        from src.main import app
+
+        # No lifespan (no `with`), so SpeciesNet is never loaded
+        client = TestClient(app)
+        response = client.post(
+            "/v1/vision/detection",
+            content=b"garbage",
+            headers={"content-type": "multipart/form-data; boundary=abc"},
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_rejects_non_multipart(self):
+        request = make_request(b"{}", content_type="application/json")
+        with self.assertRaises(InvalidUploadError):
+            asyncio.run(read_image_upload(request, max_size=1_000_000))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,192 @@
+import unittest
+from unittest.mock import AsyncMock, MagicMock
+import sys
+import os
+import io
+import tempfile
+import types
+import asyncio
+import numpy as np
+import torch
+from PIL import Image
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from speciesnet.classifier import SpeciesNetClassifier
+from src.clients.blue_onyx import BlueOnyxClient
+from src.config import settings
+from src.inference.speciesnet_wrapper import SpeciesNetWrapper
+from src.engine import DetectionEngine
+from src.inference.taxonomy import TaxonomyIndex
+
+LABELS = [
+    "f1856211-cfb7-4a5b-9158-c0f72fd09ee6;;;;;;blank",
+    "uuid-possum;mammalia;diprotodontia;phalangeridae;trichosurus;vulpecula;common brushtail possum",
+    "uuid-turkey;aves;galliformes;phasianidae;meleagris;gallopavo;wild turkey",
+]
+
+class ToChannelsFirst(torch.nn.Module):
+    def forward(self, x):
+        return x.permute(0, 3, 1, 2)
+
+def make_backbone(embedding_dim=8):
+    # Takes NHWC input like the SpeciesNet classifier
+    return torch.nn.Sequential(
+        ToChannelsFirst(),
+        torch.nn.Conv2d(3, embedding_dim, 3, stride=8),
+        torch.nn.AdaptiveAvgPool2d(1),
+        torch.nn.Flatten(),
+    )
+
+def fixed_logits_model(probs, embedding_dim=8):
+    # Classifier whose output softmaxes to `probs` for any input frame
+    head = torch.nn.Linear(embedding_dim, len(probs))
+    with torch.no_grad():
+        head.weight.zero_()
+        head.bias.copy_(torch.log(torch.tensor(probs)))
+    return torch.nn.Sequential(make_backbone(embedding_dim), head)
+
+def make_jpeg(seed=0, brightness=0):
+    buffer = io.BytesIO()
+    pixels = np.random.default_rng(seed).integers(0, 200, (120, 200, 3), dtype=np.uint8) + np.uint8(brightness)
+    Image.fromarray(pixels).save(buffer, "JPEG")
+    return memoryview(buffer.getvalue())
+
+def make_wrapper(model, allowed=None):
+    classifier = types.SimpleNamespace(
+        model=model.eval(),
+        device="cpu",
+        model_info=types.SimpleNamespace(version="test", type_="always_crop"),
+    )
+    classifier.preprocess = lambda img, bboxes=None: SpeciesNetClassifier.preprocess(classifier, img, bboxes)
+    detector = types.SimpleNamespace(
+        preprocess=lambda img: img,
+        predict=lambda filepath, img: {"detections": [{"bbox": [0.1, 0.1, 0.5, 0.5], "conf": 0.9}]},
+    )
+
+    wrapper = SpeciesNetWrapper("AUS")
+    wrapper.model = types.SimpleNamespace(classifier=classifier, detector=detector)
+    wrapper.taxonomy = TaxonomyIndex(LABELS)
+    if allowed is not None:
+        wrapper.taxonomy.allowed = allowed
+    return wrapper, classifier
+
+class TestRegionMask(unittest.TestCase):
+    """Direct detector + classifier path with a geofenced class."""
+
+    def setUp(self):
+        # Blocked species at 0.90, allowed look-alike at 0.08
+        self.wrapper, classifier = make_wrapper(fixed_logits_model([0.90, 0.08, 0.02]), allowed=[False, True, True])
+        self.wrapper._apply_region_mask(classifier)
+        self.image_data = make_jpeg()
+
+    def test_reports_unmasked_score(self):
+        predictions = self.wrapper.predict(self.image_data)
+
+        self.assertEqual(len(predictions), 1)
+        self.assertEqual(predictions[0]["class_index"], 1)
+        self.assertEqual(predictions[0]["label"], self.wrapper.taxonomy.display_names[1])
+        # The blocked class's mass is not moved onto the look-alike
+        self.assertAlmostEqual(predictions[0]["confidence"], 0.08, places=4)
+        self.assertGreater(predictions[0]["x_max"], predictions[0]["x_min"])
+
+    def test_engine_filters_low_confidence_look_alike(self):
+        blue_onyx = MagicMock(spec=BlueOnyxClient)
+        blue_onyx.detect = AsyncMock(return_value={"success": True, "predictions": []})
+        self.wrapper.predict = MagicMock(wraps=self.wrapper.predict)
+        engine = DetectionEngine(blue_onyx, self.wrapper)
+
+        result = asyncio.run(engine.process_image(self.image_data))
+        self.wrapper.predict.assert_called_once()
+        self.assertEqual(result["predictions"], [])
+
+    def test_nothing_blocked_keeps_top_class(self):
+        wrapper, classifier = make_wrapper(fixed_logits_model([0.90, 0.08, 0.02]))
+        wrapper._apply_region_mask(classifier)
+        self.assertIsNone(wrapper.blocked)
+
+        predictions = wrapper.predict(self.image_data)
+        self.assertEqual(predictions[0]["class_index"], 0)
+        self.assertAlmostEqual(predictions[0]["confidence"], 0.9, places=4)
+
+class TestEmbeddingCachePath(unittest.TestCase):
+    """Cached classifier path, keyed on a descriptor of the preprocessed crop."""
+
+    def setUp(self):
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        original_dir = settings.EMBEDDING_CACHE_DIR
+        settings.EMBEDDING_CACHE_DIR = temp_dir.name
+        self.addCleanup(setattr, settings, "EMBEDDING_CACHE_DIR", original_dir)
+
+        torch.manual_seed(0)
+        self.image_data = make_jpeg()
+
+    def make_cached_wrapper(self, probs=(0.2, 0.5, 0.3), allowed=None):
+        wrapper, classifier = make_wrapper(fixed_logits_model(list(probs)), allowed=allowed)
+        wrapper._init_embedding_cache(classifier)
+        wrapper._apply_region_mask(classifier)
+        classifier.model = MagicMock(wraps=classifier.model)
+        return wrapper, classifier
+
+    def test_hit_skips_classifier(self):
+        wrapper, classifier = self.make_cached_wrapper()
+
+        first = wrapper.predict(self.image_data)
+        self.assertEqual(classifier.model.call_count, 1)
+        self.assertEqual(wrapper.cache.stats()["misses"], 1)
+
+        # Change the stored label so a hit is distinguishable from re-running the classifier
+        stored_index = (first[0]["class_index"] + 1) % len(LABELS)
+        wrapper.cache.entries["class_index"][0] = stored_index
+
+        second = wrapper.predict(self.image_data)
+        self.assertEqual(classifier.model.call_count, 1)
+        self.assertEqual(second[0]["class_index"], stored_index)
+        self.assertEqual(second[0]["label"], wrapper.taxonomy.display_names[stored_index])
+        self.assertEqual(wrapper.cache.stats()["hits"], 1)
+
+    def test_brighter_frame_of_same_subject_hits(self):
+        wrapper, classifier = self.make_cached_wrapper()
+        wrapper.predict(self.image_data)
+        wrapper.predict(make_jpeg(brightness=40))
+
+        self.assertEqual(classifier.model.call_count, 1)
+        self.assertEqual(wrapper.cache.stats()["hits"], 1)
+
+    def test_different_subject_misses(self):
+        wrapper, classifier = self.make_cached_wrapper()
+        wrapper.predict(self.image_data)
+        wrapper.predict(make_jpeg(seed=1))
+
+        self.assertEqual(classifier.model.call_count, 2)
+        self.assertEqual(wrapper.cache.stats()["misses"], 2)
+
+    def test_invalid_cache_falls_back_to_classifier(self):
+        original_size = settings.EMBEDDING_CACHE_SIZE
+        settings.EMBEDDING_CACHE_SIZE = 0
+        self.addCleanup(setattr, settings, "EMBEDDING_CACHE_SIZE", original_size)
+
+        with self.assertLogs("src.inference.speciesnet_wrapper", level="WARNING"):
+            wrapper, classifier = self.make_cached_wrapper(probs=(0.90, 0.08, 0.02), allowed=[False, True, True])
+        self.assertIsNone(wrapper.cache)
+
+        # Region mask still applies on the uncached path
+        predictions = wrapper.predict(self.image_data)
+        self.assertEqual(classifier.model.call_count, 1)
+        self.assertEqual(predictions[0]["class_index"], 1)
+        self.assertAlmostEqual(predictions[0]["confidence"], 0.08, places=4)
+
+    def test_region_mask_applies_with_cache(self):
+        wrapper, _ = self.make_cached_wrapper(probs=(0.90, 0.08, 0.02), allowed=[False, True, True])
+        self.assertIsNotNone(wrapper.cache)
+
+        for _ in range(2):  # miss, then hit
+            predictions = wrapper.predict(self.image_data)
+            self.assertEqual(predictions[0]["class_index"], 1)
+            self.assertAlmostEqual(predictions[0]["confidence"], 0.08, places=4)
+        self.assertEqual(wrapper.cache.stats()["hits"], 1)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,21 +1,52 @@
 import httpx
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Union, AsyncIterator
 import os
+import uuid
 
 class BlueOnyxClient:
-    def __init__(self, base_url: str):
+    def __init__(self, base_url: str, transport: Optional[httpx.AsyncBaseTransport] = None):
         self.base_url = base_url.rstrip('/')
         self.detect_url = f"{self.base_url}/v1/vision/detection"
+        self.transport = transport  # Optional override, e.g. httpx.MockTransport in tests
 
-    async def detect(self, image_data: bytes) -> Dict[str, Any]:
+    def _build_multipart(self, image_data: Union[bytes, memoryview]):
+        """
+        Builds the multipart envelope around the image buffer.
+        Returns (content_type, content_length, body_stream).
+        """
+        boundary = uuid.uuid4().hex
+        head = (
+            f"--{boundary}\r\n"
+            f'Content-Disposition: form-data; name="image"; filename="image.jpg"\r\n'
+            f"Content-Type: image/jpeg\r\n\r\n"
+        ).encode("ascii")
+        tail = f"\r\n--{boundary}--\r\n".encode("ascii")
+
+        async def body() -> AsyncIterator[bytes]:
+            yield head
+            yield image_data
+            yield tail
+
+        content_length = len(head) + len(image_data) + len(tail)
+        return f"multipart/form-data; boundary={boundary}", content_length, body()
+
+    async def detect(self, image_data: Union[bytes, memoryview]) -> Dict[str, Any]:
         """
         Sends image to Blue Onyx for detection.
+        The ingest buffer is streamed as the middle chunk of a hand-built multipart
+        body, so no full-frame copy is made here (the HTTP layer still copies each
+        chunk as it writes it to the socket).
         Returns the raw JSON response from Blue Onyx (CodeProject.AI format).
         """
         try:
-            files = {'image': ('image.jpg', image_data, 'image/jpeg')}
-            async with httpx.AsyncClient() as client:
-                response = await client.post(self.detect_url, files=files, timeout=10.0)
+            content_type, content_length, body = self._build_multipart(image_data)
+            headers = {
+                "Content-Type": content_type,
+                # Explicit length so the stream is not sent chunked
+                "Content-Length": str(content_length),
+            }
+            async with httpx.AsyncClient(transport=self.transport) as client:
+                response = await client.post(self.detect_url, content=body, headers=headers, timeout=10.0)
                 response.raise_for_status()
                 return response.json()
         except Exception as e:
@@ -7,6 +7,11 @@ class Settings(BaseSettings):
     SPECIESNET_BLANK_LABEL: str = "f1856211-cfb7-4a5b-9158-c0f72fd09ee6;;;;;;blank"
     SPECIESNET_CONFIDENCE_THRESHOLD: float = 0.7
     TRIGGER_LABELS: List[str] = ["animal", "cat", "dog", "bird"]
+    MAX_UPLOAD_SIZE: int = 20 * 1024 * 1024  # bytes, whole multipart request body
+    EMBEDDING_CACHE_ENABLED: bool = False
+    EMBEDDING_CACHE_DIR: str = "cache"
+    EMBEDDING_CACHE_SIZE: int = 5000  # max stored crops (LRU eviction)
+    EMBEDDING_CACHE_THRESHOLD: float = 0.97  # crop descriptor similarity needed to reuse a label
     PORT: int = 8000
     HOST: str = "0.0.0.0"
     LOG_LEVEL: str = "INFO"
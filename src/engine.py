@@ -4,6 +4,7 @@ from src.inference.speciesnet_wrapper import SpeciesNetWrapper
 import logging
 import time
 import asyncio
+from typing import Union
 
 logger = logging.getLogger(__name__)
 
@@ -13,7 +14,7 @@ class DetectionEngine:
         self.speciesnet = speciesnet
         self.processing_lock = asyncio.Lock()
 
-    async def process_image(self, image_data: bytes):
+    async def process_image(self, image_data: Union[bytes, memoryview]):
         start_time_total = time.perf_counter()
         logger.info(f"Received detection request for image of size: {len(image_data)} bytes")
         # ... (rest of logic) ...
@@ -68,15 +69,13 @@ class DetectionEngine:
             # Filter blank predictions and check confidence
             valid_sn_predictions = []
             if sn_predictions:
+                taxonomy = self.speciesnet.taxonomy
                 for pred in sn_predictions:
-                    # Clean the label (take last part of semicolon string)
-                    raw_label = pred.get("label", "")
-                    clean_label = raw_label.split(";")[-1]
-                    pred["label"] = clean_label
+                    # Label is already the display name; the class index drives the flags
+                    class_index = pred.pop("class_index")
                     
                     # 1. Check Blank Label
-                    # Check against the raw setting OR the cleaned "blank" string just in case
-                    if raw_label == settings.SPECIESNET_BLANK_LABEL or clean_label.lower() == "blank":
+                    if taxonomy.is_blank[class_index]:
                         logger.debug("Ignoring SpeciesNet blank prediction.")
                         continue
                     
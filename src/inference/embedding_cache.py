@@ -0,0 +1,149 @@
+import numpy as np
+from typing import Any, Dict, Optional, Tuple
+import json
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+# Per-slot metadata stored next to the vectors. class_index == -1 marks an empty slot.
+ENTRY_DTYPE = np.dtype([
+    ("class_index", "<i4"),
+    ("score", "<f4"),
+    ("last_used", "<i8"),
+])
+
+class EmbeddingCache:
+    """
+    Persistent nearest-neighbour cache of image embeddings -> final label.
+
+    Vectors and metadata live in memory-mapped files under `cache_dir`, so entries
+    survive restarts and lookups are a single matrix-vector product over the page
+    cache. When full, the least recently used entry is overwritten.
+
+    Not thread-safe: callers serialise access (SpeciesNet runs under the engine lock).
+    """
+
+    VECTORS_FILE = "embeddings.f32"
+    ENTRIES_FILE = "entries.bin"
+    INFO_FILE = "index.json"
+
+    def __init__(self, cache_dir: str, dim: int, capacity: int, threshold: float, fingerprint: Dict[str, Any]):
+        if capacity < 1:
+            raise ValueError(f"Embedding cache capacity must be at least 1, got {capacity}")
+        self.cache_dir = cache_dir
+        self.dim = dim
+        self.capacity = capacity
+        self.threshold = threshold
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        os.makedirs(cache_dir, exist_ok=True)
+        info = {"dim": dim, "capacity": capacity, **fingerprint}
+        info_path = os.path.join(cache_dir, self.INFO_FILE)
+        vectors_path = os.path.join(cache_dir, self.VECTORS_FILE)
+        entries_path = os.path.join(cache_dir, self.ENTRIES_FILE)
+
+        existing = None
+        if os.path.exists(info_path) and os.path.exists(vectors_path) and os.path.exists(entries_path):
+            try:
+                with open(info_path, mode="r", encoding="utf-8") as fp:
+                    existing = json.load(fp)
+            except Exception as e:
+                logger.warning(f"Failed to read embedding cache index, rebuilding: {e}")
+
+        opened = False
+        if existing == info:
+            try:
+                # np.memmap "r+" silently zero-extends short files, so check sizes ourselves
+                expected_sizes = [
+                    (vectors_path, capacity * dim * np.dtype(np.float32).itemsize),
+                    (entries_path, capacity * ENTRY_DTYPE.itemsize),
+                ]
+                for path, size in expected_sizes:
+                    if os.path.getsize(path) != size:
+                        raise ValueError(f"{path} is {os.path.getsize(path)} bytes, expected {size}")
+                self.vectors = np.memmap(vectors_path, dtype=np.float32, mode="r+", shape=(capacity, dim))
+                self.entries = np.memmap(entries_path, dtype=ENTRY_DTYPE, mode="r+", shape=(capacity,))
+                opened = True
+            except Exception as e:
+                # e.g. a file truncated by a crash while the cache was being created
+                logger.warning(f"Failed to open embedding cache files, rebuilding: {e}")
+        elif existing is not None:
+            # Different model, region or sizing: old labels/embeddings can't be trusted.
+            logger.info("Embedding cache settings or model changed. Starting a fresh cache.")
+
+        if not opened:
+            # Drop the index first so an interrupted rebuild is never mistaken for a valid cache
+            if os.path.exists(info_path):
+                os.remove(info_path)
+            self.vectors = np.memmap(vectors_path, dtype=np.float32, mode="w+", shape=(capacity, dim))
+            self.entries = np.memmap(entries_path, dtype=ENTRY_DTYPE, mode="w+", shape=(capacity,))
+            self.entries["class_index"] = -1
+            self.flush()
+            with open(info_path, mode="w", encoding="utf-8") as fp:
+                json.dump(info, fp)
+
+        # Slots are filled in order, so the used ones are always a prefix.
+        used = self.entries["class_index"] >= 0
+        self.count = int(used.sum())
+        self.clock = int(self.entries["last_used"][:self.count].max()) + 1 if self.count else 0
+        logger.info(f"Embedding cache loaded from {cache_dir}: {self.count}/{capacity} entries")
+
+    @staticmethod
+    def normalize(embedding: np.ndarray) -> np.ndarray:
+        embedding = np.asarray(embedding, dtype=np.float32).reshape(-1)
+        norm = np.linalg.norm(embedding)
+        return embedding / norm if norm > 0 else embedding
+
+    def lookup(self, embedding: np.ndarray) -> Optional[Tuple[int, float]]:
+        """
+        Returns (class_index, score) of the most similar stored entry if its cosine
+        similarity is at least the threshold, otherwise None.
+        `embedding` must already be L2-normalised.
+        """
+        if self.count:
+            similarities = self.vectors[:self.count] @ embedding
+            slot = int(np.argmax(similarities))
+            if similarities[slot] >= self.threshold:
+                self.hits += 1
+                self.entries["last_used"][slot] = self.clock
+                self.clock += 1
+                logger.debug(f"Embedding cache hit (slot {slot}, similarity {similarities[slot]:.3f})")
+                return int(self.entries["class_index"][slot]), float(self.entries["score"][slot])
+
+        self.misses += 1
+        return None
+
+    def add(self, embedding: np.ndarray, class_index: int, score: float):
+        """
+        Stores an L2-normalised embedding with its final label, evicting the
+        least recently used entry when the cache is full.
+        """
+        if self.count < self.capacity:
+            slot = self.count
+            self.count += 1
+        else:
+            slot = int(np.argmin(self.entries["last_used"]))
+            self.evictions += 1
+
+        self.vectors[slot] = embedding
+        self.entries[slot] = (class_index, score, self.clock)
+        self.clock += 1
+
+    def flush(self):
+        self.vectors.flush()
+        self.entries.flush()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": self.count,
+            "capacity": self.capacity,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
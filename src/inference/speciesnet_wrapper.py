@@ -1,11 +1,13 @@
 from speciesnet import SpeciesNet, DEFAULT_MODEL
 from speciesnet.detector import SpeciesNetDetector
-from PIL import Image
+from speciesnet.utils import BBox
+from src.config import settings
+from src.inference.embedding_cache import EmbeddingCache
+from src.inference.taxonomy import TaxonomyIndex
+from PIL import Image, ImageOps
+import numpy as np
 import io
-import tempfile
-import os
-import uuid
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Union
 import logging
 import time
 import torch
@@ -13,9 +15,14 @@ import torch
 logger = logging.getLogger(__name__)
 
 class SpeciesNetWrapper:
+    DESCRIPTOR_GRID = 16  # Side of the crop thumbnail used as the cache key
+
     def __init__(self, region: str = "AUS"):
         self.region = region  # specific to country code, e.g., 'AUS'
         self.model = None
+        self.taxonomy = None
+        self.cache = None  # EmbeddingCache, when EMBEDDING_CACHE_ENABLED
+        self.blocked = None  # Bool mask of classes geofenced out of the region, if any
         self.device_name = "CPU"
 
     def initialize(self):
@@ -30,7 +37,20 @@ class SpeciesNetWrapper:
         logger.info(f"Initializing SpeciesNet with model: {DEFAULT_MODEL}")
         # Initialize with the default model. 
         # components="all" implies detector + classifier + ensemble
-        self.model = SpeciesNet(model_name=DEFAULT_MODEL)
+        # Geofencing is applied at the classifier logits (see _classify), so the ensemble doesn't redo it per call.
+        self.model = SpeciesNet(model_name=DEFAULT_MODEL, geofence=False)
+
+        # Build the label index and region mask once from the model's own files
+        classifier = self.model.classifier
+        self.taxonomy = TaxonomyIndex.from_files(
+            classifier.model_info.classifier_labels,
+            classifier.model_info.geofence,
+            self.region,
+            settings.SPECIESNET_BLANK_LABEL,
+        )
+        if settings.EMBEDDING_CACHE_ENABLED:
+            self._init_embedding_cache(classifier)
+        self._apply_region_mask(classifier)
         
         # Log Device Info
         if torch.cuda.is_available():
@@ -45,116 +65,166 @@ class SpeciesNetWrapper:
             self.device_name = "CPU"
             logger.warning("GPU NOT Detected. SpeciesNet will use CPU (slower).")
 
-    def predict(self, image_data: bytes) -> List[Dict[str, Any]]:
+    def _apply_region_mask(self, classifier):
         """
-        Runs prediction on the image data using SpeciesNet.
+        Builds the mask of classes geofenced out of the region, used by _classify.
         """
-        if not self.model:
-            self.initialize()
+        if not self.taxonomy.num_blocked:
+            return
+        self.blocked = ~torch.tensor(self.taxonomy.allowed, dtype=torch.bool, device=classifier.device)
+        logger.info(f"Masking {self.taxonomy.num_blocked} classes outside {self.region} at the classifier logits")
 
-        temp_path = None
+    def _init_embedding_cache(self, classifier):
+        """
+        Opens the on-disk cache of crop descriptors -> final label.
+        Leaves the cache disabled (uncached classifier path) if it can't be opened.
+        """
         try:
-            # SpeciesNet library requires a filepath.
-            # Create a unique temp file.
-            filename = f"{uuid.uuid4()}.jpg"
-            temp_path = os.path.join(tempfile.gettempdir(), filename)
-            
-            with open(temp_path, "wb") as f:
-                f.write(image_data)
-            
-            # Predict using the file path
-            # country should be ISO 3166-1 alpha-3 (e.g. 'AUS')
-            logger.debug(f"Running SpeciesNet prediction on {temp_path} with country={self.region}")
-            
-            # The predict method returns a dict: {'predictions': [ {result_for_file_1}, ... ]}
-            start_t = time.perf_counter()
-            result = self.model.predict(
-                filepaths=[temp_path],
-                country=self.region
+            self.cache = EmbeddingCache(
+                settings.EMBEDDING_CACHE_DIR,
+                dim=self.DESCRIPTOR_GRID * self.DESCRIPTOR_GRID * 3,
+                capacity=settings.EMBEDDING_CACHE_SIZE,
+                threshold=settings.EMBEDDING_CACHE_THRESHOLD,
+                fingerprint={"model_version": classifier.model_info.version, "region": self.region},
             )
-            end_t = time.perf_counter()
-            logger.debug(f"SpeciesNet internal model.predict took {(end_t - start_t)*1000:.2f}ms")
-
-            if not result or "predictions" not in result or not result["predictions"]:
-                return []
-            
-            # Extract the single result
-            prediction = result["predictions"][0]
-            
-            # Parse the output to matching CodeProject.AI format
-            mapped_predictions = []
-            
-            logger.debug(f"SpeciesNet raw prediction keys: {prediction.keys()}")
-
-            # Check for classifications (species level)
-            classifications = prediction.get("classifications", {})
-            classes = classifications.get("classes", [])
-            scores = classifications.get("scores", [])
-            
-            # Check for detections (bboxes)
-            # 'detections' key usually contains a list of dicts directly
-            detections = prediction.get("detections", [])
-            
-            # If we have species classifications, use the top one
-            if classes and scores:
-                top_label = classes[0]
-                top_score = scores[0]
-                
-                # Use the first detection box if available, otherwise full image
-                # CodeProject EXPECTS a bounding box.
-                bbox = {"x_min": 0, "y_min": 0, "x_max": 0, "y_max": 0} # Default
-                
-                if detections:
-                    logger.debug(f"SpeciesNet detections list: {detections}")
-                    d = detections[0]
-                    if "bbox" in d:
-                        b = d["bbox"]
-                        if isinstance(b, list) and len(b) >= 4:
-                             # SpeciesNet format appears to be [x_norm, y_norm, w_norm, h_norm]
-                             # Based on log analysis: 
-                             # x=0.83 (3215/3840), y=0.54 (1187/2160), w=0.07 (285/3840), h=0.12 (272/2160)
-                             
-                             norm_x, norm_y, norm_w, norm_h = b[0], b[1], b[2], b[3]
-                             
-                             # Get image dimensions to scale up
-                             try:
-                                 with Image.open(io.BytesIO(image_data)) as img:
-                                     width, height = img.size
-                                 
-                                 # Convert to absolute pixels
-                                 x_min = int(norm_x * width)
-                                 y_min = int(norm_y * height)
-                                 x_max = int((norm_x + norm_w) * width)
-                                 y_max = int((norm_y + norm_h) * height)
-                                 
-                                 bbox = {
-                                     "y_min": y_min, 
-                                     "x_min": x_min, 
-                                     "y_max": y_max, 
-                                     "x_max": x_max
-                                 }
-                             except Exception as e:
-                                 logger.error(f"Failed to calculate absolute bbox coordinates: {e}")
-                                 pass
-
-                mapped_predictions.append({
-                    "label": top_label,
-                    "confidence": float(top_score),
-                    "y_min": bbox["y_min"], 
-                    "x_min": bbox["x_min"], 
-                    "y_max": bbox["y_max"], 
-                    "x_max": bbox["x_max"]
-                })
-            
-            return mapped_predictions
+        except Exception as e:
+            self.cache = None
+            logger.warning(f"Failed to open embedding cache in {settings.EMBEDDING_CACHE_DIR}: {e}. Embedding cache disabled.")
+
+    @classmethod
+    def _crop_descriptor(cls, arr: np.ndarray) -> np.ndarray:
+        """
+        Cheap cache key computed from the preprocessed crop before the classifier runs:
+        the crop block-averaged to a DESCRIPTOR_GRID x DESCRIPTOR_GRID RGB thumbnail,
+        mean-centred and L2-normalised (cosine similarity is then a correlation,
+        so small lighting shifts between frames don't break a match).
+        """
+        grid = cls.DESCRIPTOR_GRID
+        height, width = arr.shape[0] // grid, arr.shape[1] // grid
+        blocks = arr[:height * grid, :width * grid].astype(np.float32).reshape(grid, height, grid, width, -1)
+        thumbnail = blocks.mean(axis=(1, 3))
+        return EmbeddingCache.normalize(thumbnail - thumbnail.mean())
+
+    def shutdown(self):
+        if self.cache is not None:
+            self.cache.flush()
+            logger.info(f"Embedding cache stats: {self.cache.stats()}")
 
+    def predict(self, image_data: Union[bytes, memoryview]) -> List[Dict[str, Any]]:
+        """
+        Runs prediction on the image data using the SpeciesNet detector and classifier.
+        """
+        if not self.model:
+            self.initialize()
+
+        try:
+            return self._predict_direct(image_data)
         except Exception as e:
             logger.error(f"Error in SpeciesNet prediction: {e}", exc_info=True)
             return []
-        finally:
-            # Cleanup
-            if temp_path and os.path.exists(temp_path):
-                try:
-                    os.remove(temp_path)
-                except:
-                    pass
+
+    def _predict_direct(self, image_data: Union[bytes, memoryview]) -> List[Dict[str, Any]]:
+        """
+        Runs detector + classifier directly on the in-memory image (no temp file,
+        no ensemble). With the embedding cache enabled, reuses the cached label
+        when the crop's descriptor matches a stored one.
+        """
+        detector = self.model.detector
+        classifier = self.model.classifier
+        start_t = time.perf_counter()
+
+        # Same loading steps as speciesnet.utils.load_rgb_image, straight from memory
+        with Image.open(io.BytesIO(image_data)) as raw:
+            raw.load()
+            img = ImageOps.exif_transpose(raw.convert("RGB"))
+
+        detections = detector.predict("frame", detector.preprocess(img)).get("detections") or []
+        bboxes = [BBox(*d["bbox"]) for d in detections]
+        crop = classifier.preprocess(img, bboxes=bboxes)
+
+        cached, key = None, None
+        if self.cache is not None:
+            # Keyed on the crop itself, so a hit skips the classifier network entirely
+            key = self._crop_descriptor(crop.arr)
+            cached = self.cache.lookup(key)
+
+        if cached is not None:
+            class_index, score = cached
+        else:
+            # NHWC float input in [0, 1], as in SpeciesNetClassifier.batch_predict
+            batch = torch.from_numpy(crop.arr[np.newaxis].astype(np.float32) / 255).to(classifier.device)
+            with torch.inference_mode():
+                class_index, score = self._classify(classifier.model(batch))
+            if self.cache is not None:
+                self.cache.add(key, class_index, score)
+
+        end_t = time.perf_counter()
+        cache_note = "" if self.cache is None else f" (cache {'hit' if cached else 'miss'})"
+        logger.debug(f"SpeciesNet inference took {(end_t - start_t)*1000:.2f}ms{cache_note}")
+
+        return [self._map_prediction(class_index, score, detections, image_data)]
+
+    def _classify(self, logits: torch.Tensor):
+        """
+        Returns (class_index, score) for a single-frame batch of logits.
+        Out-of-region classes are masked when picking the class, but the score is
+        the class's unmasked softmax probability, so a look-alike of a blocked
+        species keeps its own (low) confidence.
+        """
+        scores = torch.softmax(logits, dim=-1)[0]
+        if self.blocked is not None:
+            logits = logits.masked_fill(self.blocked, float("-inf"))
+        class_index = int(torch.argmax(logits[0]))
+        return class_index, float(scores[class_index])
+
+    def _map_prediction(self, class_index: int, score: float, detections: List[Dict[str, Any]], image_data: Union[bytes, memoryview]) -> Dict[str, Any]:
+        """
+        Maps a classification plus SpeciesNet detections to a CodeProject.AI prediction.
+        """
+        # Use the first detection box if available, otherwise full image
+        # CodeProject EXPECTS a bounding box.
+        bbox = {"x_min": 0, "y_min": 0, "x_max": 0, "y_max": 0} # Default
+        
+        if detections:
+            logger.debug(f"SpeciesNet detections list: {detections}")
+            d = detections[0]
+            if "bbox" in d:
+                b = d["bbox"]
+                if isinstance(b, list) and len(b) >= 4:
+                     # SpeciesNet format appears to be [x_norm, y_norm, w_norm, h_norm]
+                     # Based on log analysis: 
+                     # x=0.83 (3215/3840), y=0.54 (1187/2160), w=0.07 (285/3840), h=0.12 (272/2160)
+                     
+                     norm_x, norm_y, norm_w, norm_h = b[0], b[1], b[2], b[3]
+                     
+                     # Get image dimensions to scale up
+                     try:
+                         with Image.open(io.BytesIO(image_data)) as img:
+                             width, height = img.size
+                         
+                         # Convert to absolute pixels
+                         x_min = int(norm_x * width)
+                         y_min = int(norm_y * height)
+                         x_max = int((norm_x + norm_w) * width)
+                         y_max = int((norm_y + norm_h) * height)
+                         
+                         bbox = {
+                             "y_min": y_min, 
+                             "x_min": x_min, 
+                             "y_max": y_max, 
+                             "x_max": x_max
+                         }
+                     except Exception as e:
+                         logger.error(f"Failed to calculate absolute bbox coordinates: {e}")
+                         pass
+
+        return {
+            "class_index": class_index,
+            "label": self.taxonomy.display_names[class_index],
+            "confidence": float(score),
+            "y_min": bbox["y_min"], 
+            "x_min": bbox["x_min"], 
+            "y_max": bbox["y_max"], 
+            "x_max": bbox["x_max"]
+        }
+    
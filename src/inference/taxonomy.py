@@ -0,0 +1,58 @@
+from speciesnet.constants import Classification
+from speciesnet.geofence_utils import should_geofence_animal_classification
+from typing import Dict, List, Optional
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+class TaxonomyIndex:
+    """
+    Lookup tables for the SpeciesNet classifier labels, built once at startup.
+
+    Class index -> display name plus blank/human/vehicle flags, and an allowed-class
+    mask for the configured region (from the model's geofence file). Post-processing
+    then only needs list lookups by class index instead of string work per frame.
+    """
+
+    def __init__(self, labels: List[str], blank_label: str = Classification.BLANK.value,
+                 geofence_map: Optional[dict] = None, region: Optional[str] = None):
+        self.labels = labels
+        self.region = region
+        # Labels look like "uuid;class;order;family;genus;species;common name"
+        self.display_names = [label.split(";")[-1] for label in labels]
+        self.index_of: Dict[str, int] = {label: idx for idx, label in enumerate(labels)}
+
+        self.is_blank = [
+            label == blank_label or name.lower() == "blank"
+            for label, name in zip(labels, self.display_names)
+        ]
+        self.is_human = [label == Classification.HUMAN.value for label in labels]
+        self.is_vehicle = [label == Classification.VEHICLE.value for label in labels]
+
+        # Same rules SpeciesNet's ensemble applies per prediction, evaluated once per class
+        if geofence_map and region:
+            self.allowed = [
+                not should_geofence_animal_classification(label, region, None, geofence_map, True)
+                for label in labels
+            ]
+        else:
+            self.allowed = [True] * len(labels)
+
+    @property
+    def num_blocked(self) -> int:
+        return self.allowed.count(False)
+
+    @classmethod
+    def from_files(cls, labels_path, geofence_path, region: Optional[str], blank_label: str) -> "TaxonomyIndex":
+        """
+        Builds the index from the model's classifier labels file and geofence JSON.
+        """
+        with open(labels_path, mode="r", encoding="utf-8") as fp:
+            labels = [line.strip() for line in fp.readlines()]
+        with open(geofence_path, mode="r", encoding="utf-8") as fp:
+            geofence_map = json.load(fp)
+
+        index = cls(labels, blank_label=blank_label, geofence_map=geofence_map, region=region)
+        logger.info(f"Built taxonomy index: {len(labels)} classes, {index.num_blocked} blocked for region {region}")
+        return index
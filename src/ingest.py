@@ -0,0 +1,144 @@
+from fastapi import Request
+from typing import Optional
+import logging
+
+try:
+    import python_multipart as multipart
+    from python_multipart.exceptions import MultipartParseError
+    from python_multipart.multipart import parse_options_header
+except ModuleNotFoundError:  # Older python-multipart releases
+    import multipart
+    from multipart.exceptions import MultipartParseError
+    from multipart.multipart import parse_options_header
+
+logger = logging.getLogger(__name__)
+
+
+class UploadTooLargeError(Exception):
+    """Raised when the request body exceeds the configured MAX_UPLOAD_SIZE."""
+
+
+class InvalidUploadError(Exception):
+    """Raised when the request is not a multipart upload containing the image field."""
+
+
+class ImageUploadReader:
+    """
+    Streams a multipart/form-data request straight into a single in-memory buffer.
+
+    Starlette's UploadFile spools anything over 1 MB to a temp file on disk, and
+    `await image.read()` then copies it back into memory. Here we feed the raw
+    request stream into python-multipart ourselves and write the image part's
+    bytes directly into a bytearray that is pre-sized from Content-Length.
+    The result is a memoryview over that buffer, which is passed on to
+    Blue Onyx forwarding and SpeciesNet.
+    """
+
+    def __init__(self, max_size: int, field_name: str = "image"):
+        self.max_size = max_size
+        self.field_name = field_name
+
+        self._buffer = bytearray()
+        self._length = 0
+        self._found = False
+        self._in_target = False
+        self._header_field = b""
+        self._header_value = b""
+        self._part_name: Optional[str] = None
+
+    async def read(self, request: Request) -> memoryview:
+        content_type = request.headers.get("content-type", "")
+        media_type, params = parse_options_header(content_type)
+        if media_type != b"multipart/form-data":
+            raise InvalidUploadError(f"Expected multipart/form-data, got '{content_type}'")
+
+        boundary = params.get(b"boundary")
+        if not boundary:
+            raise InvalidUploadError("Missing multipart boundary")
+
+        content_length = request.headers.get("content-length")
+        if content_length is not None:
+            try:
+                content_length = int(content_length)
+            except ValueError:
+                raise InvalidUploadError(f"Invalid Content-Length '{content_length}'")
+            if content_length > self.max_size:
+                raise UploadTooLargeError(
+                    f"Upload of {content_length} bytes exceeds limit of {self.max_size} bytes"
+                )
+            # The body (boundaries + headers + image) is an upper bound on the image size,
+            # so one allocation up front avoids any resizing while we stream.
+            self._buffer = bytearray(content_length)
+
+        parser = multipart.MultipartParser(boundary, {
+            "on_part_begin": self._on_part_begin,
+            "on_header_field": self._on_header_field,
+            "on_header_value": self._on_header_value,
+            "on_header_end": self._on_header_end,
+            "on_part_data": self._on_part_data,
+            "on_part_end": self._on_part_end,
+        })
+
+        received = 0
+        try:
+            async for chunk in request.stream():
+                received += len(chunk)
+                if received > self.max_size:
+                    # Covers chunked requests (and clients that under-report Content-Length).
+                    raise UploadTooLargeError(f"Upload exceeds limit of {self.max_size} bytes")
+                parser.write(chunk)
+            parser.finalize()
+        except MultipartParseError as e:
+            raise InvalidUploadError(f"Malformed multipart body: {e}") from e
+
+        if not self._found:
+            raise InvalidUploadError(f"Multipart body has no '{self.field_name}' field")
+
+        logger.debug(f"Ingested {self._length} byte image from {received} byte request body")
+        return memoryview(self._buffer)[:self._length]
+
+    # python-multipart callbacks
+
+    def _on_part_begin(self):
+        self._part_name = None
+        self._header_field = b""
+        self._header_value = b""
+
+    def _on_header_field(self, data: bytes, start: int, end: int):
+        self._header_field += data[start:end]
+
+    def _on_header_value(self, data: bytes, start: int, end: int):
+        self._header_value += data[start:end]
+
+    def _on_header_end(self):
+        if self._header_field.lower() == b"content-disposition":
+            _, options = parse_options_header(self._header_value)
+            name = options.get(b"name")
+            self._part_name = name.decode("latin-1") if name is not None else None
+            # Only capture the first matching part; anything after it is ignored.
+            self._in_target = not self._found and self._part_name == self.field_name
+        self._header_field = b""
+        self._header_value = b""
+
+    def _on_part_data(self, data: bytes, start: int, end: int):
+        if not self._in_target:
+            return
+        new_length = self._length + (end - start)
+        # Fills the pre-sized buffer in place; without a Content-Length the slice
+        # assignment grows it instead (bounded by max_size in read()).
+        self._buffer[self._length:new_length] = memoryview(data)[start:end]
+        self._length = new_length
+
+    def _on_part_end(self):
+        if self._in_target:
+            self._found = True
+            self._in_target = False
+
+
+async def read_image_upload(request: Request, max_size: int, field_name: str = "image") -> memoryview:
+    """
+    Reads the image field of a multipart request into memory without spooling to disk.
+    Raises UploadTooLargeError or InvalidUploadError on bad input, and lets
+    starlette's ClientDisconnect through if the client goes away mid-upload.
+    """
+    return await ImageUploadReader(max_size, field_name).read(request)
@@ -1,11 +1,14 @@
-from fastapi import FastAPI, UploadFile, File, HTTPException, Request
+from fastapi import FastAPI, HTTPException, Request
+from starlette.requests import ClientDisconnect
 from contextlib import asynccontextmanager
 from src.config import settings
 from src.engine import DetectionEngine
+from src.ingest import read_image_upload, UploadTooLargeError, InvalidUploadError
 from src.clients.blue_onyx import BlueOnyxClient
 from src.inference.speciesnet_wrapper import SpeciesNetWrapper
 import uvicorn
 import logging
+import asyncio
 
 # Setup logging
 # logging.basicConfig(level=logging.INFO) # Handled by server.py or uvicorn
@@ -13,36 +16,53 @@ logger = logging.getLogger(__name__)
 
 # Initialize singletons
 blue_onyx = BlueOnyxClient(settings.BLUE_ONYX_URL)
-speciesnet = SpeciesNetWrapper()
+speciesnet = SpeciesNetWrapper(settings.SPECIESNET_REGION)
 engine = DetectionEngine(blue_onyx, speciesnet)
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
     logger.info("Initializing dependencies...")
-    # Pre-warm SpeciesNet?
+    # Load SpeciesNet (and build its taxonomy index) now rather than on the first triggered frame
+    await asyncio.to_thread(speciesnet.initialize)
     yield
     # Shutdown
     logger.info("Shutting down dependencies...")
-    # nothing to clean up explicitly for now
+    await asyncio.to_thread(speciesnet.shutdown)
 
 app = FastAPI(lifespan=lifespan)
 
 # Root Endpoint
 @app.get("/")
 async def root():
-    return {"status": "running", "service": "AI-Vision-Relay", "gpu": speciesnet.device_name}
+    status = {"status": "running", "service": "AI-Vision-Relay", "gpu": speciesnet.device_name}
+    if speciesnet.cache is not None:
+        status["embedding_cache"] = speciesnet.cache.stats()
+    return status
 
 @app.get("/health")
 async def health():
     return {"status": "healthy"}
 
 @app.post("/v1/vision/detection")
-async def detect(image: UploadFile = File(...)):
+async def detect(request: Request):
     # Determine which client sent the request (Blue Iris usually checks /v1/vision/detection)
+    # Parse the 'image' field straight into memory (no UploadFile disk spooling)
+    try:
+        image_data = await read_image_upload(request, settings.MAX_UPLOAD_SIZE)
+    except UploadTooLargeError as e:
+        logger.warning(f"Rejected upload: {e}")
+        raise HTTPException(status_code=413, detail=str(e))
+    except InvalidUploadError as e:
+        logger.warning(f"Rejected upload: {e}")
+        raise HTTPException(status_code=400, detail=str(e))
+    except ClientDisconnect:
+        # Nobody is left to read the response; just don't report it as a server error
+        logger.info("Client disconnected during upload")
+        raise HTTPException(status_code=400, detail="Client disconnected")
+
     # Just forward to engine
     try:
-        image_data = await image.read()
         result = await engine.process_image(image_data)
         return result
     except Exception as e: